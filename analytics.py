@@ -0,0 +1,180 @@
+from sqlalchemy import func
+from models import db, Doctor, Department, Appointment, AppointmentRollup
+
+# Rollups are keyed by (scope, key) so every report is a handful of indexed
+# lookups no matter how many appointments exist.
+SCOPE_ALL = 'all'
+SCOPE_DOCTOR = 'doctor'
+SCOPE_DEPARTMENT = 'department'
+SCOPE_DAY = 'day'
+
+
+def _keys_for(appointment, doctor):
+    keys = [(SCOPE_ALL, 'all'),
+            (SCOPE_DOCTOR, str(doctor.id)),
+            (SCOPE_DAY, appointment.appointment_date.isoformat())]
+    if doctor.department_id:
+        keys.append((SCOPE_DEPARTMENT, str(doctor.department_id)))
+    return keys
+
+
+def _insert(table):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def _apply(keys, appointments=0, completed=0, revenue=0.0):
+    rollup = AppointmentRollup.__table__
+    if min(appointments, completed, revenue) < 0:
+        # Removals only adjust rows that already exist; a missing row means
+        # the rollup is out of date, which rebuild_rollups() repairs.
+        for scope, key in keys:
+            db.session.execute(rollup.update().where(
+                rollup.c.scope == scope, rollup.c.key == key
+            ).values(appointments=rollup.c.appointments + appointments,
+                     completed=rollup.c.completed + completed,
+                     revenue=rollup.c.revenue + revenue))
+        return
+    # Upsert, so concurrent first bookings for a new (scope, key) both land
+    # instead of one failing on uq_rollup_scope_key.
+    for scope, key in keys:
+        statement = _insert(rollup).values(scope=scope, key=key, appointments=appointments,
+                                           completed=completed, revenue=revenue)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[rollup.c.scope, rollup.c.key],
+            set_={'appointments': rollup.c.appointments + statement.excluded.appointments,
+                  'completed': rollup.c.completed + statement.excluded.completed,
+                  'revenue': rollup.c.revenue + statement.excluded.revenue}))
+
+
+def _doctor_for(appointment):
+    return appointment.doctor or Doctor.query.get(appointment.doctor_id)
+
+
+# The record_* helpers only stage changes on the current session; callers
+# commit them together with the appointment change they describe.
+def record_booked(appointment):
+    doctor = _doctor_for(appointment)
+    _apply(_keys_for(appointment, doctor), appointments=1)
+
+
+def record_completed(appointment, previous_status):
+    if previous_status == 'Completed':
+        return
+    doctor = _doctor_for(appointment)
+    _apply(_keys_for(appointment, doctor), completed=1, revenue=doctor.fees or 0.0)
+
+
+def record_deleted(appointment):
+    doctor = _doctor_for(appointment)
+    if appointment.status == 'Completed':
+        _apply(_keys_for(appointment, doctor), appointments=-1, completed=-1,
+               revenue=-(doctor.fees or 0.0))
+    else:
+        _apply(_keys_for(appointment, doctor), appointments=-1)
+
+
+def record_doctor_changed(doctor, old_department_id, old_fees):
+    # Revenue is counted at the doctor's current fee and appointments under
+    # their current department (as rebuild_rollups() does), so an edit to
+    # either re-prices or moves the doctor's existing contributions.
+    old_fees = old_fees or 0.0
+    new_fees = doctor.fees or 0.0
+    if new_fees != old_fees:
+        difference = new_fees - old_fees
+        per_day = db.session.query(Appointment.appointment_date, func.count(Appointment.id)).filter(
+            Appointment.doctor_id == doctor.id, Appointment.status == 'Completed'
+        ).group_by(Appointment.appointment_date).all()
+        for day, count in per_day:
+            _apply([(SCOPE_DAY, day.isoformat())], revenue=difference * count)
+        total = sum(count for _, count in per_day)
+        if total:
+            keys = [(SCOPE_ALL, 'all'), (SCOPE_DOCTOR, str(doctor.id))]
+            if old_department_id:
+                keys.append((SCOPE_DEPARTMENT, str(old_department_id)))
+            _apply(keys, revenue=difference * total)
+    if doctor.department_id != old_department_id:
+        rollup = AppointmentRollup.__table__
+        row = db.session.execute(db.select(rollup.c.appointments, rollup.c.completed, rollup.c.revenue).where(
+            rollup.c.scope == SCOPE_DOCTOR, rollup.c.key == str(doctor.id))).first()
+        if row and row.appointments:
+            if old_department_id:
+                _apply([(SCOPE_DEPARTMENT, str(old_department_id))], appointments=-row.appointments,
+                       completed=-row.completed, revenue=-row.revenue)
+            if doctor.department_id:
+                _apply([(SCOPE_DEPARTMENT, str(doctor.department_id))], appointments=row.appointments,
+                       completed=row.completed, revenue=row.revenue)
+
+
+def rebuild_rollups():
+    # Full recompute from the appointment table, used for repair and for
+    # databases that predate the rollup table.
+    AppointmentRollup.query.delete()
+    completed = func.sum(db.case((Appointment.status == 'Completed', 1), else_=0))
+    revenue = func.sum(db.case((Appointment.status == 'Completed', Doctor.fees), else_=0.0))
+    base = db.session.query(func.count(Appointment.id), completed, revenue).join(
+        Doctor, Appointment.doctor_id == Doctor.id)
+    groupings = [
+        (SCOPE_ALL, None),
+        (SCOPE_DOCTOR, Appointment.doctor_id),
+        (SCOPE_DEPARTMENT, Doctor.department_id),
+        (SCOPE_DAY, Appointment.appointment_date),
+    ]
+    rows = 0
+    for scope, column in groupings:
+        if column is None:
+            results = [('all',) + tuple(base.one())]
+        else:
+            results = base.add_columns(column).group_by(column).all()
+            results = [(r[3],) + tuple(r[:3]) for r in results]
+        for key, count, done, earned in results:
+            if not count:
+                continue
+            key = key.isoformat() if hasattr(key, 'isoformat') else str(key)
+            db.session.add(AppointmentRollup(scope=scope, key=key,
+                                             appointments=count,
+                                             completed=done or 0,
+                                             revenue=earned or 0.0))
+            rows += 1
+    db.session.commit()
+    return rows
+
+
+def _row_dict(row):
+    appointments = row.appointments if row else 0
+    completed = row.completed if row else 0
+    return {
+        'appointments': appointments,
+        'completed': completed,
+        'completion_rate': round(completed / appointments, 4) if appointments else 0.0,
+        'revenue': round(row.revenue, 2) if row else 0.0,
+    }
+
+
+def analytics_report(days=30):
+    totals = AppointmentRollup.query.filter_by(scope=SCOPE_ALL, key='all').first()
+
+    doctor_rows = db.session.query(AppointmentRollup, Doctor.name).join(
+        Doctor, AppointmentRollup.key == db.cast(Doctor.id, db.String)
+    ).filter(AppointmentRollup.scope == SCOPE_DOCTOR).order_by(
+        AppointmentRollup.revenue.desc()).all()
+
+    department_rows = db.session.query(AppointmentRollup, Department.name).join(
+        Department, AppointmentRollup.key == db.cast(Department.id, db.String)
+    ).filter(AppointmentRollup.scope == SCOPE_DEPARTMENT).order_by(
+        AppointmentRollup.revenue.desc()).all()
+
+    day_rows = AppointmentRollup.query.filter_by(scope=SCOPE_DAY).order_by(
+        AppointmentRollup.key.desc()).limit(days).all()
+
+    return {
+        'totals': _row_dict(totals),
+        'doctors': [dict(_row_dict(row), id=int(row.key), name=name)
+                    for row, name in doctor_rows],
+        'departments': [dict(_row_dict(row), id=int(row.key), name=name)
+                        for row, name in department_rows],
+        'days': [dict(_row_dict(row), date=row.key) for row in reversed(day_rows)],
+    }
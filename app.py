@@ -1,20 +1,61 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Patient, Doctor, Department, Appointment, MedicalRecord
+from models import db, User, Patient, Doctor, Department, Appointment, MedicalRecord, AppointmentRollup, WaitlistEntry, make_summary
 from forms import LoginForm, RegistrationForm, AppointmentForm
+from analytics import (record_booked, record_completed, record_deleted, record_doctor_changed, rebuild_rollups,
+                       analytics_report)
+from backup import BackupError, create_backup, list_backups, restore_backup
+from assets import build_assets, init_assets
+from rendering import GzipMiddleware, init_templates, minify_html, warm_templates
+from ratelimit import init_rate_limits
+from waitlist import (WaitlistError, accept_offer, backfill_slot, cancel_entry, decline_offer, expire_waitlist,
+                      held_slots, join_waitlist, period_for_slot, release_expired_offers, withdraw_offer,
+                      MAX_WAITLIST_DAYS)
+from timeline import InvalidCursor, patient_timeline, timeline_entry, timeline_summary, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from datetime import datetime, timedelta
+import click
 import os
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your_secret_key_change_in_production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///hospital_management.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR', os.path.join(app.root_path, 'backups'))
+app.config['BACKUP_RETENTION'] = int(os.environ.get('BACKUP_RETENTION', 7))
+app.config['HTML_MINIFY'] = os.environ.get('HTML_MINIFY', '0') == '1'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+app.config['JINJA_CACHE_DIR'] = os.environ.get('JINJA_CACHE_DIR', os.path.join(app.root_path, '.jinja_cache'))
+app.config['RATELIMIT_STORAGE'] = os.environ.get('RATELIMIT_STORAGE', os.path.join(app.root_path, '.ratelimit.db'))
+app.config['LOAD_SHED_QUEUE_MS'] = float(os.environ['LOAD_SHED_QUEUE_MS']) if os.environ.get('LOAD_SHED_QUEUE_MS') else None
 db.init_app(app)
+init_assets(app)
+init_templates(app)
+init_rate_limits(app)
+app.wsgi_app = GzipMiddleware(app.wsgi_app, min_size=app.config['COMPRESS_MIN_SIZE'])
+
+@app.after_request
+def minify_response(response):
+    if (app.config['HTML_MINIFY'] and response.mimetype == 'text/html'
+            and not response.direct_passthrough and not response.is_streamed):
+        response.set_data(minify_html(response.get_data(as_text=True)))
+    return response
 
 # Initialize database
 with app.app_context():
+    warm_templates(app)
     db.create_all()
+    # Add columns introduced after the first release to existing databases
+    record_columns = {c['name'] for c in db.inspect(db.engine).get_columns('medical_record')}
+    if 'summary' not in record_columns:
+        db.session.execute(db.text('ALTER TABLE medical_record ADD COLUMN summary VARCHAR(120)'))
+        for record in MedicalRecord.query.options(db.undefer_group('clinical')):
+            record.summary = make_summary(record.diagnosis)
+        db.session.commit()
+        print("Added medical record summaries.")
+    for index in (list(Appointment.__table__.indexes) + list(MedicalRecord.__table__.indexes)
+                  + list(WaitlistEntry.__table__.indexes)):
+        index.create(bind=db.engine, checkfirst=True)
     # Create admin user if it doesn't exist
     admin_email = 'admin@hospital.com'
     admin = User.query.filter_by(email=admin_email).first()
@@ -34,6 +75,73 @@ with app.app_context():
             print(f"Error creating admin user: {e}")
     else:
         print("Admin user already exists.")
+    # Backfill analytics rollups for databases created before they existed
+    if not AppointmentRollup.query.first() and Appointment.query.first():
+        print(f"Built {rebuild_rollups()} analytics rollup rows.")
+
+@app.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    """Recompute the analytics rollup tables from all appointments."""
+    print(f"Rebuilt {rebuild_rollups()} analytics rollup rows.")
+
+@app.cli.command('expire-waitlist')
+def expire_waitlist_command():
+    """Release lapsed waitlist offers and retire past waitlist days."""
+    released = expire_waitlist()
+    db.session.commit()
+    print(f"Released {released} expired waitlist offers.")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress everything under static/."""
+    manifest = build_assets(app.static_folder)
+    app.config['ASSET_MANIFEST'] = manifest
+    for logical, hashed in sorted(manifest.items()):
+        print(f"{logical} -> {hashed}")
+
+def database_path():
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database:
+        raise BackupError('Backups are only supported for file-based SQLite databases.')
+    return url.database
+
+def format_backup_report(manifest):
+    return (f"{manifest['file']}: {manifest['size_bytes']} bytes -> {manifest['compressed_bytes']} compressed, "
+            f"{manifest['duration_seconds']}s ({manifest['throughput_mb_s']} MB/s), "
+            f"{manifest['steps']} steps, writer pause max {manifest['max_writer_pause_ms']} ms "
+            f"/ avg {manifest['avg_writer_pause_ms']} ms")
+
+@app.cli.group('backup')
+def backup_command():
+    """Online backups of the SQLite database."""
+
+@backup_command.command('create')
+@click.option('--pages', default=256, help='Pages copied per backup step.')
+@click.option('--pause', default=0.005, help='Seconds to yield to writers between steps.')
+def backup_create_command(pages, pause):
+    try:
+        manifest = create_backup(database_path(), app.config['BACKUP_DIR'],
+                                 retention=app.config['BACKUP_RETENTION'], pages=pages, pause=pause)
+    except BackupError as e:
+        raise click.ClickException(str(e))
+    print(format_backup_report(manifest))
+    for name in manifest['removed']:
+        print(f"Rotated out {name}")
+
+@backup_command.command('list')
+def backup_list_command():
+    for manifest in list_backups(app.config['BACKUP_DIR']):
+        print(f"{manifest['name']}  {manifest['created_at']}  sha256={manifest['sha256'][:12]}")
+
+@backup_command.command('restore')
+@click.argument('name')
+@click.argument('target')
+def backup_restore_command(name, target):
+    try:
+        restore_backup(app.config['BACKUP_DIR'], name, target)
+    except BackupError as e:
+        raise click.ClickException(str(e))
+    print(f"Restored {name} to {target}")
 
 # Routes
 @app.route('/')
@@ -109,38 +217,21 @@ def patient_dashboard():
         flash('Patient profile not found. Please complete your registration.', 'danger')
         return redirect(url_for('logout'))
     
-    # Get patient's appointments
-    total_appointments = Appointment.query.filter_by(patient_id=patient.id).all()
+    # Counts come from one aggregate query; the lists are bounded pages
+    summary = timeline_summary(patient.id)
     
     # Get upcoming/scheduled appointments (sorted by date and time)
-    upcoming_appointments = Appointment.query.filter_by(
-        patient_id=patient.id,
-        status='Scheduled'
-    ).filter(
-        Appointment.appointment_date >= datetime.now().date()
-    ).order_by(
-        Appointment.appointment_date.asc(),
-        Appointment.time_slot.asc()
-    ).all()
-    
-    # Get completed appointments (sorted by date descending)
-    completed_appointments = Appointment.query.filter_by(
-        patient_id=patient.id,
-        status='Completed'
-    ).order_by(
-        Appointment.appointment_date.desc(),
-        Appointment.time_slot.desc()
-    ).all()
+    upcoming_appointments, _ = patient_timeline(patient.id, status='Scheduled', upcoming=True,
+                                                newest_first=False, limit=DEFAULT_PAGE_SIZE)
     
-    # Get medical reports
-    medical_records = MedicalRecord.query.filter_by(patient_id=patient.id).count()
+    # Get most recent completed appointments (sorted by date descending)
+    completed_appointments, _ = patient_timeline(patient.id, status='Completed', limit=5)
     
     return render_template('patient_dashboard.html', 
                          patient=patient,
-                         total_appointments=total_appointments,
+                         summary=summary,
                          upcoming_appointments=upcoming_appointments,
-                         completed_appointments=completed_appointments,
-                         medical_records=medical_records)
+                         completed_appointments=completed_appointments)
 
 @app.route('/doctor_dashboard')
 def doctor_dashboard():
@@ -287,6 +378,36 @@ def admin_dashboard():
                          patients=patients,
                          appointments=appointments)
 
+@app.route('/admin_analytics')
+def admin_analytics():
+    if 'user_id' not in session or session['role'] != 'admin':
+        return redirect(url_for('login'))
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    return render_template('admin_analytics.html', report=analytics_report(days=days), days=days)
+
+@app.route('/api/admin/analytics')
+def admin_analytics_json():
+    if 'user_id' not in session or session['role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    return jsonify(analytics_report(days=days))
+
+@app.route('/manage_backups', methods=['GET', 'POST'])
+def manage_backups():
+    if 'user_id' not in session or session['role'] != 'admin':
+        return redirect(url_for('login'))
+    if request.method == 'POST':
+        try:
+            manifest = create_backup(database_path(), app.config['BACKUP_DIR'],
+                                     retention=app.config['BACKUP_RETENTION'])
+            flash(f'Backup created. {format_backup_report(manifest)}', 'success')
+        except (BackupError, OSError) as e:
+            flash(f'Error creating backup: {e}', 'danger')
+        return redirect(url_for('manage_backups'))
+    backups = list_backups(app.config['BACKUP_DIR'])
+    return render_template('manage_backups.html', backups=backups,
+                           retention=app.config['BACKUP_RETENTION'])
+
 @app.route('/book_appointment', methods=['GET', 'POST'])
 def book_appointment():
     if 'user_id' not in session or session['role'] != 'patient':
@@ -299,22 +420,20 @@ def book_appointment():
         time_slot = request.form.get('time_slot')
         
         # Determine period based on time
-        hour = int(time_slot.split(':')[0])
-        if 6 <= hour < 12:
-            period = 'Morning'
-        elif 12 <= hour < 17:
-            period = 'Afternoon'
-        else:
-            period = 'Evening'
+        period = period_for_slot(time_slot)
+        
+        # Pass lapsed waitlist offers on before looking at the slot
+        if release_expired_offers(int(doctor_id), appointment_date):
+            db.session.commit()
         
-        # Check if slot is still available
+        # Check if slot is still available (booked, or held for a waitlisted patient)
         existing_appointment = Appointment.query.filter_by(
             doctor_id=doctor_id,
             appointment_date=appointment_date,
             time_slot=time_slot
         ).first()
         
-        if existing_appointment:
+        if existing_appointment or time_slot in held_slots(int(doctor_id), appointment_date):
             flash('Sorry, this time slot is no longer available. Please choose another.', 'danger')
         else:
             patient = Patient.query.filter_by(user_id=session['user_id']).first()
@@ -327,6 +446,7 @@ def book_appointment():
             )
             db.session.add(appointment)
             try:
+                record_booked(appointment)
                 db.session.commit()
                 flash('Appointment booked successfully!', 'success')
                 return redirect(url_for('patient_dashboard'))
@@ -368,14 +488,19 @@ def get_available_slots(doctor_id, date):
                 if datetime.strptime(slot, '%H:%M').time() > current_time
             ]
     
+    # Pass lapsed waitlist offers on before reading the slots
+    if release_expired_offers(doctor_id, appointment_date):
+        db.session.commit()
+    
     # Get booked appointments for this doctor on this date
     booked_appointments = Appointment.query.filter_by(
         doctor_id=doctor_id,
         appointment_date=appointment_date
     ).all()
     
-    # Create set of booked time slots
+    # Create set of booked time slots, including those held for a waitlist offer
     booked_slots = {appt.time_slot for appt in booked_appointments}
+    booked_slots |= held_slots(doctor_id, appointment_date)
     
     # Remove booked slots from available slots
     available_slots = {
@@ -396,35 +521,138 @@ def view_appointments():
         return redirect(url_for('patient_dashboard'))
     
     # Get scheduled appointments sorted by date and time
-    scheduled_appointments = Appointment.query.filter_by(
-        patient_id=patient.id,
-        status='Scheduled'
-    ).order_by(
-        Appointment.appointment_date.asc(),
-        Appointment.time_slot.asc()
-    ).all()
+    scheduled_appointments, _ = patient_timeline(patient.id, status='Scheduled', newest_first=False, limit=None)
     
-    # Get completed appointments sorted by date descending
-    completed_appointments = Appointment.query.filter_by(
-        patient_id=patient.id,
-        status='Completed'
-    ).order_by(
-        Appointment.appointment_date.desc(),
-        Appointment.time_slot.desc()
-    ).all()
+    # Get a page of completed appointments sorted by date descending
+    cursor = request.args.get('cursor')
+    try:
+        completed_appointments, next_cursor = patient_timeline(patient.id, status='Completed', cursor=cursor)
+    except InvalidCursor:
+        return redirect(url_for('view_appointments'))
     
     return render_template('view_appointments.html', 
                          scheduled_appointments=scheduled_appointments,
-                         completed_appointments=completed_appointments)
+                         completed_appointments=completed_appointments,
+                         cursor=cursor,
+                         next_cursor=next_cursor)
+
+@app.route('/api/patient/timeline')
+def patient_timeline_json():
+    if 'user_id' not in session or session['role'] != 'patient':
+        return jsonify({'error': 'Unauthorized'}), 401
+    patient = Patient.query.filter_by(user_id=session['user_id']).first()
+    if not patient:
+        return jsonify({'error': 'Patient profile not found'}), 404
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    try:
+        appointments, next_cursor = patient_timeline(patient.id, cursor=cursor, limit=limit,
+                                                     status=request.args.get('status'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'summary': timeline_summary(patient.id) if not cursor else None,
+        'entries': [timeline_entry(appointment) for appointment in appointments],
+        'next_cursor': next_cursor,
+    })
+
+@app.route('/waitlist', methods=['GET', 'POST'])
+def waitlist():
+    if 'user_id' not in session or session['role'] != 'patient':
+        return redirect(url_for('login'))
+    patient = Patient.query.filter_by(user_id=session['user_id']).first()
+    if not patient:
+        flash('Patient profile not found.', 'danger')
+        return redirect(url_for('patient_dashboard'))
+    
+    if request.method == 'POST':
+        doctor_id = request.form.get('doctor_id')
+        department_id = request.form.get('department_id')
+        try:
+            doctor = Doctor.query.get_or_404(int(doctor_id)) if doctor_id else None
+            department = Department.query.get_or_404(int(department_id)) if department_id and not doctor else None
+        except ValueError:
+            flash('Please choose a valid doctor or department.', 'danger')
+            return redirect(url_for('waitlist'))
+        try:
+            start_date = datetime.strptime(request.form.get('start_date', ''), '%Y-%m-%d').date()
+            end_date = datetime.strptime(request.form.get('end_date', ''), '%Y-%m-%d').date()
+            join_waitlist(patient, start_date, end_date, doctor=doctor,
+                          department_id=department.id if department else None,
+                          auto_assign=request.form.get('auto_assign') == 'on')
+            db.session.commit()
+            flash('You have joined the waitlist. We will book or offer you the first slot that frees up.', 'success')
+        except ValueError:
+            db.session.rollback()
+            flash('Please provide valid dates.', 'danger')
+        except WaitlistError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+        return redirect(url_for('waitlist'))
+    
+    entries = WaitlistEntry.query.filter_by(patient_id=patient.id).order_by(WaitlistEntry.created_at.desc()).all()
+    doctors = Doctor.query.all()
+    departments = Department.query.all()
+    today = datetime.now().date()
+    return render_template('waitlist.html',
+                         entries=entries,
+                         now=datetime.now(),
+                         doctors=doctors,
+                         departments=departments,
+                         min_date=today.strftime('%Y-%m-%d'),
+                         max_date=(today + timedelta(days=MAX_WAITLIST_DAYS - 1)).strftime('%Y-%m-%d'))
+
+@app.route('/waitlist/<int:id>/<action>', methods=['POST'])
+def update_waitlist_entry(id, action):
+    if 'user_id' not in session or session['role'] != 'patient':
+        return redirect(url_for('login'))
+    patient = Patient.query.filter_by(user_id=session['user_id']).first()
+    entry = WaitlistEntry.query.get_or_404(id)
+    if not patient or entry.patient_id != patient.id:
+        flash('You can only manage your own waitlist entries!', 'danger')
+        return redirect(url_for('waitlist'))
+    
+    try:
+        if action == 'accept':
+            accept_offer(entry)
+            flash('Appointment booked successfully!', 'success')
+        elif action == 'decline':
+            decline_offer(entry)
+            flash('Offer declined. You are still on the waitlist.', 'info')
+        elif action == 'cancel':
+            cancel_entry(entry)
+            flash('You have left the waitlist.', 'info')
+        else:
+            return redirect(url_for('waitlist'))
+        db.session.commit()
+    except WaitlistError as e:
+        # Keep state changes such as releasing an expired offer
+        db.session.commit()
+        flash(str(e), 'warning')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error updating waitlist: {str(e)}', 'danger')
+    return redirect(url_for('waitlist'))
 
 @app.route('/view_medical_records')
 def view_medical_records():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     patient = Patient.query.filter_by(user_id=session['user_id']).first()
-    records = MedicalRecord.query.filter_by(patient_id=patient.id).all()
+    records = MedicalRecord.query.filter_by(patient_id=patient.id).order_by(MedicalRecord.id.desc()).all()
     return render_template('view_medical_records.html', records=records)
 
+@app.route('/view_medical_records/<int:record_id>')
+def view_patient_medical_record(record_id):
+    if 'user_id' not in session or session['role'] != 'patient':
+        return redirect(url_for('login'))
+    patient = Patient.query.filter_by(user_id=session['user_id']).first()
+    record = MedicalRecord.query.options(db.undefer_group('clinical')).get_or_404(record_id)
+    if not patient or record.patient_id != patient.id:
+        flash('You can only view your own medical reports!', 'danger')
+        return redirect(url_for('view_medical_records'))
+    return render_template('view_medical_record_patient.html', record=record)
+
 @app.route('/doctor_appointments')
 def doctor_appointments():
     if 'user_id' not in session or session['role'] != 'doctor':
@@ -464,6 +692,7 @@ def complete_appointment(id):
             return redirect(url_for('doctor_appointments'))
         
         # Update status to Completed
+        record_completed(appointment, appointment.status)
         appointment.status = 'Completed'
         db.session.commit()
         flash('Appointment marked as completed!', 'success')
@@ -513,6 +742,7 @@ def add_medical_record(appointment_id):
             db.session.add(record)
             
             # Update appointment status to Completed
+            record_completed(appointment, appointment.status)
             appointment.status = 'Completed'
             
             db.session.commit()
@@ -537,7 +767,7 @@ def view_medical_record(appointment_id):
         flash('You can only view records for your own appointments!', 'danger')
         return redirect(url_for('doctor_appointments'))
     
-    record = MedicalRecord.query.filter_by(appointment_id=appointment_id).first()
+    record = MedicalRecord.query.options(db.undefer_group('clinical')).filter_by(appointment_id=appointment_id).first()
     if not record:
         flash('No medical report found for this appointment!', 'warning')
         return redirect(url_for('doctor_appointments'))
@@ -552,10 +782,10 @@ def doctor_medical_records():
     if not doctor:
         flash('Doctor profile not found.', 'danger')
         return redirect(url_for('login'))
-    # Get all appointments for this doctor
-    appointments = Appointment.query.filter_by(doctor_id=doctor.id).all()
-    appointment_ids = [appt.id for appt in appointments]
-    records = MedicalRecord.query.filter(MedicalRecord.appointment_id.in_(appointment_ids)).all()
+    # Get records for this doctor's appointments; clinical text stays deferred
+    records = MedicalRecord.query.join(Appointment, MedicalRecord.appointment_id == Appointment.id).filter(
+        Appointment.doctor_id == doctor.id
+    ).order_by(Appointment.appointment_date.desc()).all()
     return render_template('doctor_medical_records.html', records=records, doctor=doctor)
 
 @app.route('/manage_doctors', methods=['GET', 'POST'])
@@ -614,7 +844,17 @@ def delete_patient(id):
         patient = Patient.query.get_or_404(id)
         
         # Delete associated records first
+        freed_slots = []
+        for entry in WaitlistEntry.query.filter_by(patient_id=id).all():
+            if entry.status == 'Offered':
+                freed_slots.append((entry.offer_doctor, entry.offer_date, entry.offer_time_slot))
+            db.session.delete(entry)
+        for appt in Appointment.query.filter_by(patient_id=id).all():
+            record_deleted(appt)
+            freed_slots.append((appt.doctor, appt.appointment_date, appt.time_slot))
         Appointment.query.filter_by(patient_id=id).delete()
+        for doctor, appointment_date, time_slot in freed_slots:
+            backfill_slot(doctor, appointment_date, time_slot)
         MedicalRecord.query.filter_by(patient_id=id).delete()
         
         # Delete associated user account if exists
@@ -681,6 +921,17 @@ def delete_department(id):
         flash('Cannot delete department with assigned doctors.', 'danger')
     else:
         try:
+            # Only department-wide entries belong to the department; pass
+            # on any slot still held for one of them
+            freed_slots = []
+            for entry in WaitlistEntry.query.filter(WaitlistEntry.department_id == id,
+                                                    WaitlistEntry.doctor_id.is_(None)).all():
+                if entry.status == 'Offered':
+                    freed_slots.append((entry.offer_doctor, entry.offer_date, entry.offer_time_slot))
+                db.session.delete(entry)
+            db.session.flush()
+            for doctor, appointment_date, time_slot in freed_slots:
+                backfill_slot(doctor, appointment_date, time_slot)
             db.session.delete(department)
             db.session.commit()
             flash('Department deleted successfully!', 'success')
@@ -698,6 +949,7 @@ def edit_doctor(id):
     specialization = request.form.get('specialization')
     department_id = request.form.get('department_id')
     fees = request.form.get('fees')
+    old_department_id, old_fees = doctor.department_id, doctor.fees
     if name:
         doctor.name = name
     if specialization is not None:
@@ -707,6 +959,8 @@ def edit_doctor(id):
     if fees:
         doctor.fees = float(fees)
     try:
+        db.session.flush()
+        record_doctor_changed(doctor, old_department_id, old_fees)
         db.session.commit()
         flash('Doctor updated successfully!', 'success')
     except:
@@ -726,6 +980,12 @@ def delete_doctor(id):
     try:
         # optionally delete associated user
         user = User.query.get(doctor.user_id)
+        for entry in WaitlistEntry.query.filter_by(doctor_id=id).all():
+            db.session.delete(entry)
+        # Department-wide entries holding an offer for this doctor stay on the waitlist
+        for entry in WaitlistEntry.query.filter(WaitlistEntry.doctor_id.is_(None),
+                                                WaitlistEntry.offer_doctor_id == id).all():
+            withdraw_offer(entry)
         db.session.delete(doctor)
         if user:
             db.session.delete(user)
@@ -749,9 +1009,16 @@ def delete_appointment(id):
         return redirect(url_for('login'))
     appt = Appointment.query.get_or_404(id)
     try:
+        freed_slot = (appt.doctor, appt.appointment_date, appt.time_slot)
+        record_deleted(appt)
         db.session.delete(appt)
+        db.session.flush()
+        # Hand the freed slot to the waitlist in the same transaction
+        backfilled = backfill_slot(*freed_slot)
         db.session.commit()
         flash('Appointment deleted successfully!', 'success')
+        if backfilled:
+            flash(f'The freed slot was {backfilled.status.lower()} to waitlisted patient {backfilled.patient.name}.', 'info')
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting appointment: {e}', 'danger')
@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fingerprinted copies of static/ are built into static/dist/ together with a
+# manifest mapping each original filename to its hashed name. When the
+# manifest exists, url_for('static', ...) emits the hashed URL and those files
+# are served with immutable cache headers; otherwise static files are served
+# exactly as before.
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.json', '.txt')
+IMMUTABLE_MAX_AGE = 31536000
+
+
+def build_assets(static_folder):
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist_folder):
+        shutil.rmtree(dist_folder)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_folder]
+        for filename in files:
+            source = os.path.join(root, filename)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+            target = os.path.join(dist_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+            if ext in COMPRESSIBLE:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+            manifest[logical] = f'{DIST_DIR}/{hashed}'
+    with open(os.path.join(dist_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def init_assets(app):
+    app.config.setdefault('ASSET_MANIFEST', load_manifest(app.static_folder))
+    default_static = app.view_functions['static']
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = app.config['ASSET_MANIFEST'].get(values['filename'], values['filename'])
+
+    def static(filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return default_static(filename=filename)
+        accepted = request.accept_encodings
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = None
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[encoding] and os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+                response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype,
+                                               max_age=IMMUTABLE_MAX_AGE,
+                                               download_name=os.path.basename(filename))
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(app.static_folder, filename, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+# Snapshots are written as <name>.db.gz with a <name>.json manifest next to
+# them holding the checksum and the timings of the run that produced it.
+SNAPSHOT_SUFFIX = '.db.gz'
+MANIFEST_SUFFIX = '.json'
+CHUNK_SIZE = 1024 * 1024
+
+
+class BackupError(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _online_copy(db_path, target_path, pages, pause, max_restarts):
+    # sqlite3's backup() only sleeps when the source is busy, so the pause
+    # between steps is taken in the progress callback instead. Each step holds
+    # a read lock on the source; the time spent inside a step is how long a
+    # writer could have been kept waiting.
+    #
+    # A write through another connection makes SQLite restart the copy from
+    # the first page. Under constant writes that can go on forever, so after
+    # max_restarts the copy is redone as a single step.
+    step_times = []
+    state = {'started': time.perf_counter(), 'total': 0, 'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        step_times.append(time.perf_counter() - state['started'])
+        state['total'] = total
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+        if remaining and pause:
+            time.sleep(pause)
+        state['started'] = time.perf_counter()
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(target_path)
+    try:
+        begun = time.perf_counter()
+        try:
+            source.backup(target, pages=pages, progress=progress)
+            single_step = False
+        except _TooManyRestarts:
+            state['started'] = time.perf_counter()
+            source.backup(target, pages=-1, progress=progress)
+            single_step = True
+        elapsed = time.perf_counter() - begun
+        page_size = source.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+    return {
+        'pages': state['total'],
+        'page_size': page_size,
+        'steps': len(step_times),
+        'restarts': state['restarts'],
+        'single_step_fallback': single_step,
+        'duration_seconds': round(elapsed, 4),
+        'max_writer_pause_ms': round(max(step_times, default=0) * 1000, 3),
+        'avg_writer_pause_ms': round(sum(step_times) / len(step_times) * 1000, 3) if step_times else 0.0,
+    }
+
+
+def create_backup(db_path, backup_dir, retention=7, pages=256, pause=0.005, max_restarts=3):
+    if not os.path.exists(db_path):
+        raise BackupError(f'Database file not found: {db_path}')
+    os.makedirs(backup_dir, exist_ok=True)
+
+    base = os.path.splitext(os.path.basename(db_path))[0]
+    name = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    raw_path = os.path.join(backup_dir, name + '.db.partial')
+    snapshot_path = os.path.join(backup_dir, name + SNAPSHOT_SUFFIX)
+
+    try:
+        stats = _online_copy(db_path, raw_path, pages, pause, max_restarts)
+        raw_size = os.path.getsize(raw_path)
+        checksum = _sha256_file(raw_path)
+        with open(raw_path, 'rb') as src, gzip.open(snapshot_path + '.partial', 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(snapshot_path + '.partial', snapshot_path)
+    finally:
+        for leftover in (raw_path, snapshot_path + '.partial'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    manifest = dict(stats,
+                    name=name,
+                    file=os.path.basename(snapshot_path),
+                    created_at=datetime.now().isoformat(timespec='seconds'),
+                    source=os.path.abspath(db_path),
+                    sha256=checksum,
+                    size_bytes=raw_size,
+                    compressed_bytes=os.path.getsize(snapshot_path),
+                    throughput_mb_s=round(raw_size / stats['duration_seconds'] / 1e6, 2)
+                    if stats['duration_seconds'] else 0.0)
+    with open(os.path.join(backup_dir, name + MANIFEST_SUFFIX), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    manifest['removed'] = rotate_backups(backup_dir, retention)
+    return manifest
+
+
+def list_backups(backup_dir):
+    if not os.path.isdir(backup_dir):
+        return []
+    manifests = []
+    for filename in os.listdir(backup_dir):
+        if not filename.endswith(MANIFEST_SUFFIX):
+            continue
+        with open(os.path.join(backup_dir, filename)) as f:
+            manifests.append(json.load(f))
+    return sorted(manifests, key=lambda m: m['name'], reverse=True)
+
+
+def rotate_backups(backup_dir, retention):
+    removed = []
+    for manifest in list_backups(backup_dir)[max(retention, 1):]:
+        for filename in (manifest['file'], manifest['name'] + MANIFEST_SUFFIX):
+            path = os.path.join(backup_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+        removed.append(manifest['name'])
+    return removed
+
+
+def restore_backup(backup_dir, name, target_path):
+    # Restores only ever write a new file; swapping it in for the live
+    # database is left to the operator.
+    if os.path.exists(target_path):
+        raise BackupError(f'Refusing to overwrite existing file: {target_path}')
+    manifest_path = os.path.join(backup_dir, name + MANIFEST_SUFFIX)
+    if not os.path.exists(manifest_path):
+        raise BackupError(f'Backup not found: {name}')
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    partial_path = target_path + '.partial'
+    try:
+        with gzip.open(os.path.join(backup_dir, manifest['file']), 'rb') as src, \
+                open(partial_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        if _sha256_file(partial_path) != manifest['sha256']:
+            raise BackupError(f'Checksum mismatch for backup {name}')
+        conn = sqlite3.connect(partial_path)
+        try:
+            result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise BackupError(f'Integrity check failed for backup {name}: {result}')
+        os.replace(partial_path, target_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return manifest
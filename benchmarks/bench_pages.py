@@ -0,0 +1,150 @@
+"""Render time and bytes-on-wire for the main HTML pages.
+
+Runs against a throwaway SQLite database seeded with sample data:
+
+    python benchmarks/bench_pages.py [--requests 20]
+
+For each page it reports template load time without and with the bytecode
+cache, then median response time and response size for the plain page, with
+gzip, and with gzip plus HTML minification.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='hms-bench-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+sys.path.insert(0, ROOT)
+
+from jinja2 import Environment, FileSystemBytecodeCache  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app, db  # noqa: E402
+from models import User, Patient, Doctor, Department, Appointment, MedicalRecord  # noqa: E402
+from analytics import rebuild_rollups  # noqa: E402
+
+PAGES = [
+    ('admin', '/admin_dashboard', 'admin_dashboard.html'),
+    ('admin', '/manage_doctors', 'manage_doctors.html'),
+    ('admin', '/manage_appointments', 'manage_appointments.html'),
+    ('patient', '/patient_dashboard', 'patient_dashboard.html'),
+    ('patient', '/book_appointment', 'book_appointment.html'),
+    ('patient', '/view_appointments', 'view_appointments.html'),
+    ('patient', '/view_medical_records', 'view_medical_records.html'),
+    ('doctor', '/doctor_dashboard', 'doctor_dashboard.html'),
+    ('doctor', '/doctor_appointments', 'doctor_appointments.html'),
+    ('doctor', '/doctor_medical_records', 'doctor_medical_records.html'),
+]
+
+
+def seed(doctors=20, appointments_per_doctor=40):
+    users = {}
+    with app.app_context():
+        users['admin'] = User.query.filter_by(role='admin').first().id
+        departments = [Department(name=f'Department {i}') for i in range(5)]
+        db.session.add_all(departments)
+        db.session.flush()
+        patient_user = User(username='patient', email='patient@example.com',
+                            password=generate_password_hash('patient123'), role='patient')
+        db.session.add(patient_user)
+        db.session.flush()
+        patient = Patient(user_id=patient_user.id, name='Bench Patient', dob=date(1990, 1, 1),
+                          gender='Female', phone='5550000')
+        db.session.add(patient)
+        db.session.flush()
+        users['patient'] = patient_user.id
+        slots = ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '13:00', '13:30']
+        for i in range(doctors):
+            user = User(username=f'doctor{i}', email=f'doctor{i}@example.com',
+                        password=generate_password_hash('doctor123'), role='doctor')
+            db.session.add(user)
+            db.session.flush()
+            doctor = Doctor(user_id=user.id, name=f'Doctor {i}', specialization='General',
+                            department_id=departments[i % len(departments)].id, fees=500.0)
+            db.session.add(doctor)
+            db.session.flush()
+            users.setdefault('doctor', user.id)
+            for j in range(appointments_per_doctor):
+                day = date.today() + timedelta(days=j // len(slots) - appointments_per_doctor // (2 * len(slots)))
+                done = day < date.today()
+                appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=day,
+                                          time_slot=slots[j % len(slots)], period='Morning',
+                                          status='Completed' if done else 'Scheduled')
+                db.session.add(appointment)
+                db.session.flush()
+                if done:
+                    db.session.add(MedicalRecord(patient_id=patient.id, appointment_id=appointment.id,
+                                                 diagnosis='Seasonal allergy. ' * 20,
+                                                 prescription='Antihistamine once daily. ' * 10,
+                                                 notes='Follow up in two weeks. ' * 10))
+        db.session.commit()
+        rebuild_rollups()
+    return users
+
+
+def template_load_times(names):
+    loader = app.jinja_env.loader
+    cache = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+    results = {}
+    for name in names:
+        cold = Environment(loader=loader)
+        start = time.perf_counter()
+        cold.get_template(name)
+        compile_time = time.perf_counter() - start
+        warm = Environment(loader=loader, bytecode_cache=cache)
+        start = time.perf_counter()
+        warm.get_template(name)
+        cached_time = time.perf_counter() - start
+        results[name] = (compile_time, cached_time)
+    return results
+
+
+def measure(client, path, requests, gzip):
+    headers = {'Accept-Encoding': 'gzip'} if gzip else {'Accept-Encoding': 'identity'}
+    timings = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        timings.append(time.perf_counter() - start)
+        size = len(response.data)
+        assert response.status_code == 200, (path, response.status_code)
+    return statistics.median(timings) * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    users = seed()
+    clients = {}
+    for role, user_id in users.items():
+        clients[role] = app.test_client()
+        with clients[role].session_transaction() as sess:
+            sess['user_id'] = user_id
+            sess['role'] = role
+
+    loads = template_load_times([template for _, _, template in PAGES])
+    print(f"{'template':<30} {'compile ms':>10} {'cached ms':>10} "
+          f"{'plain ms':>9} {'plain B':>8} {'gzip ms':>8} {'gzip B':>7} {'min+gz ms':>10} {'min+gz B':>9}")
+    for role, path, template in PAGES:
+        client = clients[role]
+        app.config['HTML_MINIFY'] = False
+        plain = measure(client, path, args.requests, gzip=False)
+        gzipped = measure(client, path, args.requests, gzip=True)
+        app.config['HTML_MINIFY'] = True
+        minified = measure(client, path, args.requests, gzip=True)
+        compile_time, cached_time = loads[template]
+        print(f'{template:<30} {compile_time * 1000:>10.2f} {cached_time * 1000:>10.2f} '
+              f'{plain[0]:>9.2f} {plain[1]:>8} {gzipped[0]:>8.2f} {gzipped[1]:>7} '
+              f'{minified[0]:>10.2f} {minified[1]:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Latency of handing a freed slot to the waitlist at growing waitlist sizes.
+
+Runs against a throwaway SQLite database:
+
+    python benchmarks/bench_waitlist.py [--sizes 1000,10000,100000] [--trials 200]
+
+Each trial frees one booked slot and times the delete, the backfill_slot
+lookup and assignment, and the commit as one transaction.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='hms-bench-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+sys.path.insert(0, ROOT)
+
+from app import app, db  # noqa: E402
+from models import User, Patient, Doctor, Department, Appointment, WaitlistEntry, WaitlistQueueItem  # noqa: E402
+from waitlist import backfill_slot  # noqa: E402
+
+DOCTORS = 50
+DEPARTMENTS = 10
+HORIZON_DAYS = 14
+SLOTS = ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '13:00', '13:30', '14:00', '14:30',
+         '15:00', '15:30', '16:00', '16:30', '17:00', '17:30', '18:00', '18:30', '19:00', '19:30']
+
+
+def seed_people(patients):
+    departments = [Department(name=f'Department {i}') for i in range(DEPARTMENTS)]
+    db.session.add_all(departments)
+    db.session.flush()
+    doctors = []
+    for i in range(DOCTORS):
+        user = User(username=f'doctor{i}', email=f'doctor{i}@example.com', password='x', role='doctor')
+        db.session.add(user)
+        db.session.flush()
+        doctors.append(Doctor(user_id=user.id, name=f'Doctor {i}', specialization='General',
+                              department_id=departments[i % DEPARTMENTS].id))
+    db.session.add_all(doctors)
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'patient{i}', 'email': f'patient{i}@example.com', 'password': 'x', 'role': 'patient'}
+        for i in range(patients)])
+    first_user = db.session.query(db.func.min(User.id)).filter(User.role == 'patient').scalar()
+    db.session.execute(Patient.__table__.insert(), [
+        {'user_id': first_user + i, 'name': f'Patient {i}', 'dob': date(1990, 1, 1),
+         'gender': 'Other', 'phone': '5550000'} for i in range(patients)])
+    db.session.commit()
+    return doctors, db.session.query(db.func.min(Patient.id)).scalar()
+
+
+def grow_waitlist(count, doctors, first_patient, patients, rng, today):
+    next_id = (db.session.query(db.func.max(WaitlistEntry.id)).scalar() or 0) + 1
+    entries, items = [], []
+    created = datetime.now()
+    for offset in range(count):
+        doctor = rng.choice(doctors)
+        department_wide = rng.random() < 0.2
+        start = today + timedelta(days=rng.randrange(1, HORIZON_DAYS))
+        end = min(start + timedelta(days=rng.randrange(0, 7)), today + timedelta(days=HORIZON_DAYS))
+        stamp = created + timedelta(microseconds=offset)
+        entry_id = next_id + offset
+        entries.append({'id': entry_id, 'patient_id': first_patient + rng.randrange(patients),
+                        'doctor_id': None if department_wide else doctor.id,
+                        'department_id': doctor.department_id if department_wide else None,
+                        'start_date': start, 'end_date': end,
+                        'priority': rng.choice((0, 0, 0, 1)), 'auto_assign': True, 'status': 'Waiting',
+                        'created_at': stamp})
+        day = start
+        while day <= end:
+            items.append({'entry_id': entry_id, 'date': day, 'created_at': stamp,
+                          'priority': entries[-1]['priority'],
+                          'doctor_id': None if department_wide else doctor.id,
+                          'department_id': doctor.department_id if department_wide else None})
+            day += timedelta(days=1)
+    db.session.execute(WaitlistEntry.__table__.insert(), entries)
+    db.session.execute(WaitlistQueueItem.__table__.insert(), items)
+    db.session.commit()
+
+
+def run_trials(trials, doctors, first_patient, rng, today):
+    timings = []
+    assigned = 0
+    for _ in range(trials):
+        doctor = rng.choice(doctors)
+        day = today + timedelta(days=rng.randrange(1, HORIZON_DAYS))
+        slot = rng.choice(SLOTS)
+        if Appointment.query.filter_by(doctor_id=doctor.id, appointment_date=day, time_slot=slot).first():
+            continue
+        appointment = Appointment(patient_id=first_patient, doctor_id=doctor.id, appointment_date=day,
+                                  time_slot=slot, period='Morning')
+        db.session.add(appointment)
+        db.session.commit()
+
+        start = time.perf_counter()
+        db.session.delete(appointment)
+        db.session.flush()
+        if backfill_slot(doctor, day, slot):
+            assigned += 1
+        db.session.commit()
+        timings.append(time.perf_counter() - start)
+    return timings, assigned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--patients', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    today = datetime.now().date()
+    with app.app_context():
+        doctors, first_patient = seed_people(args.patients)
+        print(f"{'waitlist':>9} {'queue rows':>10} {'trials':>6} {'assigned':>8} "
+              f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+        size = 0
+        for target in [int(s) for s in args.sizes.split(',')]:
+            grow_waitlist(target - size, doctors, first_patient, args.patients, rng, today)
+            size = target
+            timings, assigned = run_trials(args.trials, doctors, first_patient, rng, today)
+            timings.sort()
+            ms = [t * 1000 for t in timings]
+            rows = WaitlistQueueItem.query.count()
+            print(f'{size:>9} {rows:>10} {len(ms):>6} {assigned:>8} {statistics.median(ms):>7.2f} '
+                  f'{ms[int(len(ms) * 0.95) - 1]:>7.2f} {ms[int(len(ms) * 0.99) - 1]:>7.2f} {ms[-1]:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,5 +5,8 @@ set -o errexit
 pip install --upgrade pip
 pip install -r requirements.txt
 
+# Fingerprint and precompress static assets
+flask --app app build-assets
+
 # Initialize the database
 python -c "from app import app, init_db; init_db()"
@@ -1,6 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 from datetime import datetime
+import base64
+import zlib
 db = SQLAlchemy()
+SUMMARY_LENGTH = 120
+COMPRESS_MIN_LENGTH = 1024
+COMPRESSED_PREFIX = '\x01z:'
+class CompressedText(db.TypeDecorator):
+    # Long clinical text is stored zlib-compressed (base64, behind a marker
+    # prefix) so the column stays TEXT and existing plain rows still read back.
+    impl = db.Text
+    cache_ok = True
+    def process_bind_param(self, value, dialect):
+        if value is None or len(value) < COMPRESS_MIN_LENGTH:
+            return value
+        packed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(value.encode('utf-8'))).decode('ascii')
+        return packed if len(packed) < len(value) else value
+    def process_result_value(self, value, dialect):
+        if value is None or not value.startswith(COMPRESSED_PREFIX):
+            return value
+        return zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX):])).decode('utf-8')
+def make_summary(text):
+    text = ' '.join((text or '').split())
+    return text if len(text) <= SUMMARY_LENGTH else text[:SUMMARY_LENGTH - 3].rstrip() + '...'
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -42,10 +65,69 @@ class Appointment(db.Model):
     period = db.Column(db.String(20), nullable=False)  # Morning, Afternoon, Evening
     status = db.Column(db.String(20), default='Scheduled')  # Status: Scheduled, Completed, Cancelled
     medical_record = db.relationship('MedicalRecord', backref='appointment', uselist=False)
+    __table_args__ = (db.Index('ix_appointment_patient_timeline', 'patient_id', 'appointment_date', 'time_slot', 'id'),)
 class MedicalRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
-    appointment_id = db.Column(db.Integer, db.ForeignKey('appointment.id'), nullable=False)
-    diagnosis = db.Column(db.Text, nullable=False)
-    prescription = db.Column(db.Text, nullable=False)
-    notes = db.Column(db.Text)
\ No newline at end of file
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointment.id'), nullable=False, index=True)
+    # Full clinical text is only loaded when one of these attributes is read;
+    # list views use summary instead.
+    diagnosis = db.deferred(db.Column(CompressedText, nullable=False), group='clinical')
+    prescription = db.deferred(db.Column(CompressedText, nullable=False), group='clinical')
+    notes = db.deferred(db.Column(CompressedText), group='clinical')
+    summary = db.Column(db.String(SUMMARY_LENGTH))
+    @validates('diagnosis')
+    def update_summary(self, key, value):
+        self.summary = make_summary(value)
+        return value
+class AppointmentRollup(db.Model):
+    # Running totals maintained from appointment status changes (see analytics.py)
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # Scopes: all, doctor, department, day
+    key = db.Column(db.String(20), nullable=False)  # Doctor/department id or ISO date
+    appointments = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    __table_args__ = (db.UniqueConstraint('scope', 'key', name='uq_rollup_scope_key'),)
+class WaitlistEntry(db.Model):
+    # A patient waiting for any slot with a doctor (or, with doctor_id unset,
+    # any doctor in department_id) between start_date and end_date.
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'))
+    department_id = db.Column(db.Integer, db.ForeignKey('department.id'))
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=0)  # Lower is served first
+    auto_assign = db.Column(db.Boolean, nullable=False, default=True)
+    status = db.Column(db.String(20), nullable=False, default='Waiting')  # Status: Waiting, Offered, Assigned, Cancelled, Expired
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    offer_doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'))
+    offer_date = db.Column(db.Date)
+    offer_time_slot = db.Column(db.String(20))
+    offer_expires_at = db.Column(db.DateTime)
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointment.id'))
+    patient = db.relationship('Patient', backref=db.backref('waitlist_entries', lazy=True))
+    doctor = db.relationship('Doctor', foreign_keys=[doctor_id])
+    offer_doctor = db.relationship('Doctor', foreign_keys=[offer_doctor_id])
+    department = db.relationship('Department')
+    queue_items = db.relationship('WaitlistQueueItem', backref='entry', lazy=True, cascade='all, delete-orphan')
+    __table_args__ = (
+        db.Index('ix_waitlist_offer_slot', 'offer_doctor_id', 'offer_date', 'status'),
+        db.Index('ix_waitlist_offer_expiry', 'status', 'offer_expires_at'),
+    )
+class WaitlistQueueItem(db.Model):
+    # One row per day a Waiting entry covers. The indexes turn every
+    # (doctor, date) and (department, date) pair into a priority queue whose
+    # head is the first row in (priority, created_at, entry_id) order.
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey('waitlist_entry.id'), nullable=False, index=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'))
+    department_id = db.Column(db.Integer, db.ForeignKey('department.id'))
+    date = db.Column(db.Date, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (
+        db.Index('ix_waitlist_doctor_queue', 'doctor_id', 'date', 'priority', 'created_at', 'entry_id'),
+        db.Index('ix_waitlist_department_queue', 'department_id', 'date', 'priority', 'created_at', 'entry_id'),
+    )
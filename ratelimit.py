@@ -0,0 +1,165 @@
+import random
+import sqlite3
+import threading
+import time
+
+from flask import jsonify, make_response, request, session
+
+# Token buckets checked in before_request, ahead of any database lookup or
+# password hashing in the views. A limit of (capacity, period) allows bursts
+# of `capacity` requests, refilled at capacity/period tokens per second.
+#
+# Buckets live in a small SQLite file next to the app (not the application
+# database) so the limits hold across all gunicorn workers on the host; the
+# 'memory' backend keeps them per process, which is enough for `flask run`.
+DEFAULT_RATE_LIMITS = {
+    'login': {'methods': ['POST'], 'ip': (10, 60), 'user': (5, 60), 'route': (50, 1)},
+    'book_appointment': {'methods': ['POST'], 'ip': (10, 60), 'user': (5, 60), 'route': (50, 1)},
+    'get_available_slots': {'methods': ['GET'], 'ip': (60, 60), 'user': (30, 60), 'route': (200, 1),
+                            'json': True},
+}
+STALE_AFTER = 24 * 60 * 60
+# How long a request waits for another worker's bucket transaction before
+# being turned away; kept short so a stuck writer sheds load instead of
+# piling up requests.
+BUSY_TIMEOUT = 0.05
+
+
+class BackendBusy(Exception):
+    pass
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, limits, now):
+        with self.lock:
+            allowed, retry_after, updates = _take(limits, now, self.buckets.get)
+            if allowed:
+                self.buckets.update(updates)
+            return allowed, retry_after
+
+
+class SQLiteBackend:
+    def __init__(self, path, timeout=BUSY_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS bucket '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self.local.conn = conn
+        return conn
+
+    def consume(self, limits, now):
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+        except sqlite3.OperationalError as e:
+            raise BackendBusy(str(e))
+        try:
+            def lookup(key):
+                return conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+
+            allowed, retry_after, updates = _take(limits, now, lookup)
+            if allowed:
+                conn.executemany('INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                                 [(key, tokens, updated) for key, (tokens, updated) in updates.items()])
+            if random.random() < 0.001:
+                conn.execute('DELETE FROM bucket WHERE updated < ?', (now - STALE_AFTER,))
+            conn.execute('COMMIT')
+        except sqlite3.OperationalError as e:
+            conn.execute('ROLLBACK')
+            raise BackendBusy(str(e))
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+
+def _take(limits, now, lookup):
+    # All buckets for a request are charged together or not at all, so a
+    # rejection by one limit doesn't drain the others.
+    updates = {}
+    retry_after = 0.0
+    for key, (capacity, period) in limits:
+        rate = capacity / period
+        row = lookup(key)
+        tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+        if tokens < 1:
+            retry_after = max(retry_after, (1 - tokens) / rate)
+        updates[key] = (tokens - 1, now)
+    return retry_after == 0.0, retry_after, updates
+
+
+def queue_latency(header, now):
+    # X-Request-Start as set by nginx ("t=1700000000.123") or Heroku-style
+    # routers (milliseconds or microseconds since the epoch).
+    if not header:
+        return None
+    value = header.strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    while started > now * 10:
+        started /= 1000.0
+    return max(0.0, now - started)
+
+
+def _reject(rule, status, message, retry_after):
+    response = jsonify({'error': message}) if rule.get('json') else make_response(message)
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def init_rate_limits(app):
+    app.config.setdefault('RATE_LIMITS', DEFAULT_RATE_LIMITS)
+    app.config.setdefault('RATELIMIT_ENABLED', True)
+    app.config.setdefault('LOAD_SHED_QUEUE_MS', None)
+    storage = app.config.get('RATELIMIT_STORAGE', 'memory')
+    app.config.setdefault('RATELIMIT_BUSY_TIMEOUT', BUSY_TIMEOUT)
+    backend = MemoryBackend() if storage == 'memory' else SQLiteBackend(storage, app.config['RATELIMIT_BUSY_TIMEOUT'])
+
+    @app.before_request
+    def admission_control():
+        rule = app.config['RATE_LIMITS'].get(request.endpoint)
+        if not app.config['RATELIMIT_ENABLED'] or not rule or request.method not in rule['methods']:
+            return None
+        now = time.time()
+
+        threshold = app.config['LOAD_SHED_QUEUE_MS']
+        if threshold is not None:
+            latency = queue_latency(request.headers.get('X-Request-Start'), now)
+            if latency is not None and latency * 1000 > threshold:
+                return _reject(rule, 503, 'Server is busy, please try again shortly.', 1)
+
+        limits = []
+        if 'route' in rule:
+            limits.append((f'route:{request.endpoint}', rule['route']))
+        if 'ip' in rule:
+            limits.append((f'ip:{request.endpoint}:{request.remote_addr}', rule['ip']))
+        if 'user' in rule:
+            # Logged-out requests (the login form itself) are keyed by the
+            # account being tried, which is what credential stuffing targets.
+            user = session.get('user_id') or request.form.get('email', '').strip().lower()
+            if user:
+                limits.append((f'user:{request.endpoint}:{user}', rule['user']))
+        try:
+            allowed, retry_after = backend.consume(limits, now)
+        except BackendBusy:
+            return _reject(rule, 503, 'Server is busy, please try again shortly.', 1)
+        if not allowed:
+            return _reject(rule, 429, 'Too many requests, please slow down.', retry_after)
+        return None
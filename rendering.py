@@ -0,0 +1,133 @@
+import os
+import re
+import zlib
+
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.wsgi import FileWrapper
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript')
+_PRESERVE = re.compile(r'(<(pre|textarea)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_INDENT = re.compile(r'\n\s+')
+
+
+def init_templates(app):
+    # Compiled templates are kept on disk so every gunicorn worker can load
+    # bytecode instead of re-parsing the templates; must run before the Jinja
+    # environment is first used.
+    cache_dir = app.config.setdefault('JINJA_CACHE_DIR', os.path.join(app.root_path, '.jinja_cache'))
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(cache_dir))
+
+
+def warm_templates(app):
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def minify_html(html):
+    # Drops indentation and blank lines but keeps line breaks, so inline
+    # scripts relying on them still parse; <pre> and <textarea> are untouched.
+    parts = _PRESERVE.split(html)
+    out = []
+    index = 0
+    while index < len(parts):
+        out.append(_INDENT.sub('\n', parts[index]))
+        if index + 1 < len(parts):
+            out.append(parts[index + 1])
+        index += 3
+    return ''.join(out)
+
+
+class GzipMiddleware:
+    # Compresses responses as they stream out. The body is buffered only until
+    # min_size bytes are seen, so small responses go out untouched and large
+    # or streamed ones are compressed chunk by chunk.
+    def __init__(self, app, min_size=500, level=6):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def __call__(self, environ, start_response):
+        if 'gzip' not in environ.get('HTTP_ACCEPT_ENCODING', '').lower() or environ['REQUEST_METHOD'] == 'HEAD':
+            return self.app(environ, start_response)
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return lambda data: None
+
+        body = self.app(environ, capture)
+        if self._passthrough(environ, body) or not self._compressible(captured['status'], captured['headers']):
+            # File bodies go back untouched so the server can still use
+            # wsgi.file_wrapper (sendfile) for them.
+            start_response(captured['status'], captured['headers'], captured['exc_info'])
+            return body
+        return self._compress(body, captured, start_response)
+
+    def _compress(self, body, captured, start_response):
+        try:
+            buffered = []
+            size = 0
+            iterator = iter(body)
+            for chunk in iterator:
+                buffered.append(chunk)
+                size += len(chunk)
+                if size >= self.min_size:
+                    break
+            else:
+                start_response(captured['status'], captured['headers'], captured['exc_info'])
+                yield from buffered
+                return
+
+            headers = []
+            vary = []
+            for key, value in captured['headers']:
+                name = key.lower()
+                if name == 'vary':
+                    vary.append(value)
+                elif name == 'etag':
+                    # The gzip body is a different representation from the
+                    # identity one, so it must not share its entity tag.
+                    headers.append((key, value[:-1] + '-gzip"' if value.endswith('"') else value))
+                elif name != 'content-length':
+                    headers.append((key, value))
+            headers.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+            headers.append(('Content-Encoding', 'gzip'))
+            start_response(captured['status'], headers, captured['exc_info'])
+
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in buffered:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            for chunk in iterator:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+                else:
+                    # Keep streamed pages streaming instead of waiting for
+                    # zlib's internal buffer to fill.
+                    yield compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield compressor.flush()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+    def _passthrough(self, environ, body):
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        return isinstance(body, FileWrapper) or (isinstance(file_wrapper, type) and isinstance(body, file_wrapper))
+
+    def _compressible(self, status, headers):
+        if not status.startswith('200'):
+            return False
+        values = {k.lower(): v for k, v in headers}
+        if 'content-encoding' in values:
+            return False
+        if values.get('content-type', '').split(';')[0].strip() not in COMPRESSIBLE_TYPES:
+            return False
+        length = values.get('content-length')
+        return length is None or int(length) >= self.min_size
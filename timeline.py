@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import contains_eager
+from models import db, Doctor, Department, Appointment, MedicalRecord
+
+# A patient's appointments and their medical records as one ordered stream.
+# Each page is a single joined query with keyset (cursor) pagination on
+# (appointment_date, time_slot, id), so the cost of a page does not grow with
+# the length of the patient's history.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(appointment):
+    payload = [appointment.appointment_date.isoformat(), appointment.time_slot, appointment.id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        day, slot, ident = json.loads(raw)
+        return date.fromisoformat(day), str(slot), int(ident)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def timeline_summary(patient_id, today=None):
+    today = today or datetime.now().date()
+    scheduled = Appointment.status == 'Scheduled'
+    row = db.session.query(
+        func.count(Appointment.id),
+        func.sum(db.case((and_(scheduled, Appointment.appointment_date >= today), 1), else_=0)),
+        func.sum(db.case((Appointment.status == 'Completed', 1), else_=0)),
+        func.count(MedicalRecord.id),
+    ).outerjoin(MedicalRecord, MedicalRecord.appointment_id == Appointment.id).filter(
+        Appointment.patient_id == patient_id
+    ).one()
+    return {
+        'total_appointments': row[0],
+        'upcoming_appointments': row[1] or 0,
+        'completed_appointments': row[2] or 0,
+        'medical_records': row[3],
+    }
+
+
+def patient_timeline(patient_id, cursor=None, limit=DEFAULT_PAGE_SIZE, status=None,
+                     upcoming=False, newest_first=True, today=None):
+    # Returns (appointments, next_cursor). Appointments come with doctor,
+    # department and medical record (summary only) already loaded.
+    query = Appointment.query.join(Doctor, Appointment.doctor_id == Doctor.id).join(
+        Department, Doctor.department_id == Department.id
+    ).outerjoin(MedicalRecord, MedicalRecord.appointment_id == Appointment.id).options(
+        contains_eager(Appointment.doctor).contains_eager(Doctor.department),
+        contains_eager(Appointment.medical_record),
+    ).filter(Appointment.patient_id == patient_id)
+    if status:
+        query = query.filter(Appointment.status == status)
+    if upcoming:
+        query = query.filter(Appointment.appointment_date >= (today or datetime.now().date()))
+
+    columns = (Appointment.appointment_date, Appointment.time_slot, Appointment.id)
+    if cursor:
+        day, slot, ident = decode_cursor(cursor)
+        before = (lambda column, value: column < value) if newest_first else (lambda column, value: column > value)
+        query = query.filter(or_(
+            before(columns[0], day),
+            and_(columns[0] == day, before(columns[1], slot)),
+            and_(columns[0] == day, columns[1] == slot, before(columns[2], ident)),
+        ))
+    query = query.order_by(*[c.desc() if newest_first else c.asc() for c in columns])
+
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def timeline_entry(appointment):
+    record = appointment.medical_record
+    return {
+        'appointment_id': appointment.id,
+        'date': appointment.appointment_date.isoformat(),
+        'time_slot': appointment.time_slot,
+        'period': appointment.period,
+        'status': appointment.status,
+        'doctor': {
+            'id': appointment.doctor.id,
+            'name': appointment.doctor.name,
+            'specialization': appointment.doctor.specialization,
+            'department': appointment.doctor.department.name,
+        },
+        'medical_record': {'id': record.id, 'summary': record.summary} if record else None,
+    }
@@ -0,0 +1,223 @@
+import heapq
+from datetime import datetime, timedelta
+
+from models import db, Appointment, WaitlistEntry, WaitlistQueueItem
+from analytics import record_booked
+
+# Freed slots are handed to the waitlist inside the transaction that frees
+# them: the head of the (doctor, date) or (department, date) queue either
+# gets the appointment booked for them (auto_assign) or is offered the slot
+# for OFFER_TTL, during which the slot is held for them. Expired offers are
+# released wherever the slot is next looked at or booked, and by the
+# expire-waitlist job. Callers commit.
+MAX_WAITLIST_DAYS = 30
+OFFER_TTL = timedelta(hours=2)
+CANDIDATE_BATCH = 20
+
+
+class WaitlistError(Exception):
+    pass
+
+
+def period_for_slot(time_slot):
+    hour = int(time_slot.split(':')[0])
+    if 6 <= hour < 12:
+        return 'Morning'
+    elif 12 <= hour < 17:
+        return 'Afternoon'
+    return 'Evening'
+
+
+def _slot_start(day, time_slot):
+    return datetime.combine(day, datetime.strptime(time_slot, '%H:%M').time())
+
+
+def _enqueue(entry, today):
+    day = max(entry.start_date, today)
+    while day <= entry.end_date:
+        entry.queue_items.append(WaitlistQueueItem(doctor_id=entry.doctor_id,
+                                                   department_id=None if entry.doctor_id else entry.department_id,
+                                                   date=day, priority=entry.priority,
+                                                   created_at=entry.created_at))
+        day += timedelta(days=1)
+
+
+def _dequeue(entry):
+    entry.queue_items.clear()
+
+
+def join_waitlist(patient, start_date, end_date, doctor=None, department_id=None, auto_assign=True, now=None):
+    now = now or datetime.now()
+    if (doctor is None) == (department_id is None):
+        raise WaitlistError('Choose either a doctor or a department.')
+    if start_date < now.date() or end_date < start_date:
+        raise WaitlistError('Choose a date range starting today or later.')
+    if (end_date - start_date).days >= MAX_WAITLIST_DAYS:
+        raise WaitlistError(f'The date range can be at most {MAX_WAITLIST_DAYS} days.')
+    # Doctor entries don't record a department: the doctor may move, and
+    # their queue is keyed by doctor alone.
+    entry = WaitlistEntry(patient_id=patient.id,
+                          doctor_id=doctor.id if doctor else None,
+                          department_id=department_id,
+                          start_date=start_date, end_date=end_date,
+                          auto_assign=auto_assign, created_at=now)
+    db.session.add(entry)
+    _enqueue(entry, now.date())
+    return entry
+
+
+def cancel_entry(entry):
+    _dequeue(entry)
+    if entry.status == 'Offered':
+        _release_offer(entry, 'Cancelled')
+    entry.status = 'Cancelled'
+
+
+def _is_eligible(patient_id, doctor_id, day, time_slot):
+    clash = Appointment.query.filter(
+        Appointment.patient_id == patient_id,
+        Appointment.appointment_date == day,
+        db.or_(Appointment.time_slot == time_slot, Appointment.doctor_id == doctor_id),
+    ).first()
+    return clash is None
+
+
+def _paged(query):
+    offset = 0
+    while True:
+        batch = query.offset(offset).limit(CANDIDATE_BATCH).all()
+        yield from batch
+        if len(batch) < CANDIDATE_BATCH:
+            return
+        offset += CANDIDATE_BATCH
+
+
+def _queue_order(item):
+    return item.priority, item.created_at, item.entry_id
+
+
+def _queue_heads(doctor, day):
+    # Merge the doctor's queue with its department's queue for this day;
+    # each side is read in index order a batch at a time.
+    order = (WaitlistQueueItem.priority, WaitlistQueueItem.created_at, WaitlistQueueItem.entry_id)
+    queues = [_paged(WaitlistQueueItem.query.filter_by(doctor_id=doctor.id, date=day).order_by(*order))]
+    if doctor.department_id:
+        queues.append(_paged(WaitlistQueueItem.query.filter_by(
+            department_id=doctor.department_id, date=day).order_by(*order)))
+    return heapq.merge(*queues, key=_queue_order)
+
+
+def book_from_waitlist(entry, doctor_id, day, time_slot):
+    appointment = Appointment(patient_id=entry.patient_id, doctor_id=doctor_id,
+                              appointment_date=day, time_slot=time_slot,
+                              period=period_for_slot(time_slot))
+    db.session.add(appointment)
+    db.session.flush()
+    record_booked(appointment)
+    _dequeue(entry)
+    _clear_offer(entry, 'Assigned')
+    entry.appointment_id = appointment.id
+    return appointment
+
+
+def backfill_slot(doctor, day, time_slot, now=None):
+    now = now or datetime.now()
+    start = _slot_start(day, time_slot)
+    if start <= now:
+        return None
+    if Appointment.query.filter_by(doctor_id=doctor.id, appointment_date=day, time_slot=time_slot).first():
+        return None
+    for item in _queue_heads(doctor, day):
+        entry = item.entry
+        if not _is_eligible(entry.patient_id, doctor.id, day, time_slot):
+            continue
+        if entry.auto_assign:
+            book_from_waitlist(entry, doctor.id, day, time_slot)
+        else:
+            _dequeue(entry)
+            entry.status = 'Offered'
+            entry.offer_doctor_id = doctor.id
+            entry.offer_date = day
+            entry.offer_time_slot = time_slot
+            entry.offer_expires_at = min(now + OFFER_TTL, start)
+        return entry
+    return None
+
+
+def _clear_offer(entry, status):
+    entry.status = status
+    entry.offer_doctor_id = entry.offer_date = entry.offer_time_slot = entry.offer_expires_at = None
+
+
+def _requeue(entry, now):
+    if entry.end_date >= now.date():
+        _enqueue(entry, now.date())
+
+
+def _release_offer(entry, status, now=None):
+    # Pass the slot on to the next in line before the entry rejoins its
+    # queue, so a declined or expired offer is not handed straight back.
+    now = now or datetime.now()
+    doctor, day, time_slot = entry.offer_doctor, entry.offer_date, entry.offer_time_slot
+    _clear_offer(entry, status)
+    db.session.flush()
+    backfill_slot(doctor, day, time_slot, now=now)
+    if status == 'Waiting':
+        _requeue(entry, now)
+
+
+def withdraw_offer(entry, now=None):
+    # The offered slot is gone (e.g. its doctor was removed): put the entry
+    # back in its queue without passing the slot on.
+    _clear_offer(entry, 'Waiting')
+    _requeue(entry, now or datetime.now())
+
+
+def held_slots(doctor_id, day, now=None):
+    now = now or datetime.now()
+    return {time_slot for (time_slot,) in db.session.query(WaitlistEntry.offer_time_slot).filter(
+        WaitlistEntry.offer_doctor_id == doctor_id, WaitlistEntry.offer_date == day,
+        WaitlistEntry.status == 'Offered', WaitlistEntry.offer_expires_at > now)}
+
+
+def release_expired_offers(doctor_id=None, day=None, now=None):
+    now = now or datetime.now()
+    query = WaitlistEntry.query.filter(WaitlistEntry.status == 'Offered', WaitlistEntry.offer_expires_at <= now)
+    if doctor_id is not None:
+        query = query.filter(WaitlistEntry.offer_doctor_id == doctor_id, WaitlistEntry.offer_date == day)
+    expired = query.all()
+    for entry in expired:
+        _release_offer(entry, 'Waiting', now)
+    return len(expired)
+
+
+def accept_offer(entry, now=None):
+    now = now or datetime.now()
+    if entry.status != 'Offered':
+        raise WaitlistError('This offer is no longer available.')
+    if entry.offer_expires_at <= now:
+        _release_offer(entry, 'Waiting', now)
+        raise WaitlistError('This offer has expired.')
+    if Appointment.query.filter_by(doctor_id=entry.offer_doctor_id, appointment_date=entry.offer_date,
+                                   time_slot=entry.offer_time_slot).first():
+        withdraw_offer(entry, now)
+        raise WaitlistError('Sorry, this slot has already been taken. You are back on the waitlist.')
+    return book_from_waitlist(entry, entry.offer_doctor_id, entry.offer_date, entry.offer_time_slot)
+
+
+def decline_offer(entry, now=None):
+    if entry.status != 'Offered':
+        raise WaitlistError('This offer is no longer available.')
+    _release_offer(entry, 'Waiting', now)
+
+
+def expire_waitlist(now=None):
+    # Periodic sweep (flask expire-waitlist): releases offers on slots nobody
+    # has looked at since they lapsed and retires past queue rows.
+    now = now or datetime.now()
+    released = release_expired_offers(now=now)
+    WaitlistQueueItem.query.filter(WaitlistQueueItem.date < now.date()).delete(synchronize_session=False)
+    WaitlistEntry.query.filter(WaitlistEntry.status == 'Waiting',
+                               WaitlistEntry.end_date < now.date()).update({'status': 'Expired'},
+                                                                           synchronize_session=False)
+    return released